@@ -10,9 +10,14 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    # Modules the agent never imports; keeps the onefile archive small so
+    # there is less to unpack on every start.
+    excludes=[
+        'tkinter', 'unittest', 'pydoc', 'doctest', 'pdb', 'sqlite3',
+        'lib2to3', 'xmlrpc', 'curses', 'test', 'distutils', 'setuptools', 'pip',
+    ],
     noarchive=False,
-    optimize=0,
+    optimize=1,
 )
 pyz = PYZ(a.pure)
 
@@ -26,7 +31,7 @@ exe = EXE(
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
+    upx=False,  # UPX-packed binaries must be decompressed at every launch
     upx_exclude=[],
     runtime_tmpdir=None,
     console=False,
@@ -0,0 +1,110 @@
+"""Startup benchmark for one-shot agent runs.
+
+Measures, in fresh interpreters:
+  * import time of monitor_agent (and whether `requests` got pulled in)
+  * time-to-first-POST: process spawn -> snapshot POST received by a local
+    stub backend
+
+    python bench_startup.py                      # default urllib transport
+    python bench_startup.py --transport requests
+    python bench_startup.py --budget-ms 150      # exit 1 if import is slower
+
+Exits non-zero when the import budget is exceeded or the urllib transport
+imports `requests`, so it can be used as a CI gate.
+"""
+import argparse
+import http.server
+import json
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+
+IMPORT_SNIPPET = """
+import sys, time
+t = time.perf_counter()
+import monitor_agent
+print(time.perf_counter() - t, 'requests' in sys.modules)
+"""
+
+POST_SNIPPET = """
+import monitor_agent as m
+cfg = {{"backend_url": {url!r}, "api_key": "bench", "transport": {transport!r},
+        "connect_timeout": 5, "read_timeout": 10, "max_retries": 1}}
+m.send_snapshot(cfg, m.make_payload())
+"""
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    received = []
+
+    def do_POST(self):
+        self.received.append(time.perf_counter())
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps({"snapshot_id": "bench"}).encode()
+        self.send_response(201)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _run(code):
+    return subprocess.run([sys.executable, "-c", code], cwd=HERE, capture_output=True, text=True, check=True)
+
+
+def measure_import(repeat):
+    best, pulled_requests = float("inf"), False
+    for _ in range(repeat):
+        secs, req = _run(IMPORT_SNIPPET).stdout.split()
+        best = min(best, float(secs))
+        pulled_requests = pulled_requests or req == "True"
+    return best * 1000, pulled_requests
+
+
+def measure_first_post(transport, repeat):
+    server = http.server.HTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/api/v1/process-snapshots/"
+    best = float("inf")
+    try:
+        for _ in range(repeat):
+            _Handler.received.clear()
+            start = time.perf_counter()
+            _run(POST_SNIPPET.format(url=url, transport=transport))
+            if _Handler.received:
+                best = min(best, _Handler.received[0] - start)
+    finally:
+        server.shutdown()
+    return best * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--transport", choices=("urllib", "requests"), default="urllib")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--budget-ms", type=float, default=150.0, help="max import time of monitor_agent")
+    args = ap.parse_args()
+
+    import_ms, pulled_requests = measure_import(args.repeat)
+    post_ms = measure_first_post(args.transport, args.repeat)
+
+    print(f"import monitor_agent:  {import_ms:7.1f} ms (budget {args.budget_ms:.0f} ms)"
+          f"{'  [requests imported]' if pulled_requests else ''}")
+    print(f"time-to-first-POST:    {post_ms:7.1f} ms ({args.transport} transport, incl. interpreter start"
+          f" and the 0.2 s CPU sampling window)")
+
+    failed = import_ms > args.budget_ms or pulled_requests
+    if failed:
+        print("FAIL: import budget exceeded or requests imported at module load")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,30 +1,41 @@
 import json
+import hashlib
+import os
 import socket
+import sys
+import threading
+from collections import deque
 import psutil
-import requests
 import configparser
 from datetime import datetime, timezone
 import time
 from pathlib import Path
 import logging
-import logging.handlers
 
 # ---------------- Paths ----------------
 APP_DIR = Path(getattr(__file__, "__file__", ".")).resolve().parent
 CONFIG_PATH = APP_DIR / "agent.ini"
 LOG_PATH = APP_DIR / "agent.log"
+BREAKER_PATH = APP_DIR / "agent.breaker.json"  # circuit state carried between one-shot runs
 
 # ---------------- Logger ----------------
 logger = logging.getLogger("agent")
-logger.setLevel(logging.INFO)
-handler = logging.handlers.RotatingFileHandler(LOG_PATH, maxBytes=512_000, backupCount=2, encoding="utf-8")
-formatter = logging.Formatter("%(asctime)s | %(levelname)s | %(message)s")
-handler.setFormatter(formatter)
-logger.addHandler(handler)
 
-console = logging.StreamHandler()
-console.setFormatter(formatter)
-logger.addHandler(console)
+def setup_logging():
+    # Called from main() so importing the module stays cheap.
+    import logging.handlers
+    if logger.handlers:
+        return
+    logger.setLevel(logging.INFO)
+    formatter = logging.Formatter("%(asctime)s | %(levelname)s | %(message)s")
+    handler = logging.handlers.RotatingFileHandler(LOG_PATH, maxBytes=512_000, backupCount=2,
+                                                   encoding="utf-8", delay=True)
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+    console = logging.StreamHandler()
+    console.setFormatter(formatter)
+    logger.addHandler(console)
 
 # ---------------- Load config ----------------
 def load_config():
@@ -35,13 +46,22 @@ def load_config():
     if "agent" not in cfg:
         raise ValueError("Missing [agent] section in config.ini")
     section = cfg["agent"]
+    # api_urls: comma/newline separated list of ingest endpoints; api_url still works
+    urls = section.get("api_urls", "").replace(",", " ").split() or [section.get("api_url", "").strip()]
     return {
-        "backend_url": section.get("api_url", "").strip(),
+        "backend_url": urls[0],
+        "backend_urls": urls,
         "api_key": section.get("api_key", "").strip(),
         "interval_sec": section.getint("interval_seconds", fallback=0),
+        # "urllib" (stdlib, fast start) or "requests" (proxies/CA handling of requests)
+        "transport": section.get("transport", "urllib").strip().lower(),
         "connect_timeout": 5,
         "read_timeout": 10,
-        "max_retries": 3
+        "max_retries": 3,
+        "breaker_failures": section.getint("breaker_failures", fallback=3),
+        "breaker_cooldown": section.getint("breaker_cooldown_seconds", fallback=30),
+        # > 0 enables the PID watcher (start/exit events between snapshots)
+        "event_interval": section.getint("event_interval_ms", fallback=0) / 1000,
     }
 
 # ---------------- Collect processes ----------------
@@ -102,45 +122,388 @@ def make_payload():
         "processes": collect_processes()
     }
 
-# ---------------- Send data ----------------
-def send_snapshot(cfg, data):
+# ---------------- Lifecycle events ----------------
+def _iso(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat()
+
+class LifecycleWatcher(threading.Thread):
+    """Watch the PID set at sub-second frequency and record start/exit events.
+
+    A scan is one listing of /proc compared with the previous PID set; only new
+    pids are inspected (a single /proc/<pid>/stat read on Linux, psutil
+    elsewhere). Processes that start and exit within one interval are missed.
+    """
+
+    def __init__(self, interval, max_buffer=10_000):
+        super().__init__(name="lifecycle-watcher", daemon=True)
+        self.interval = interval
+        self._events = deque(maxlen=max_buffer)  # oldest dropped if the backend is unreachable
+        self._lock = threading.Lock()
+        self._linux = os.path.isdir("/proc/self")
+        self._boot = self._boot_time()
+        self._ticks = os.sysconf("SC_CLK_TCK") if self._linux else 0
+        self._known = {}  # pid -> (name, ppid, start_time)
+        self._prev = set()
+
+    def _boot_time(self):
+        # /proc/uptime has 10 ms resolution; psutil.boot_time() is whole seconds
+        if self._linux:
+            with open("/proc/uptime") as f:
+                return time.time() - float(f.read().split()[0])
+        return psutil.boot_time()
+
+    def _pids(self):
+        if self._linux:
+            return {int(e) for e in os.listdir("/proc") if e.isdigit()}
+        return set(psutil.pids())
+
+    def _info(self, pid):
+        if self._linux:
+            try:
+                with open(f"/proc/{pid}/stat", "rb") as f:
+                    raw = f.read()
+            except OSError:
+                return None
+            # "pid (comm) state ppid ... starttime(22) ..."; comm may contain spaces or ')'
+            rpar = raw.rfind(b")")
+            name = raw[raw.find(b"(") + 1:rpar].decode("utf-8", "replace")
+            fields = raw[rpar + 2:].split()
+            if len(name) >= 15:
+                name = self._full_name(pid, name)
+            return name, int(fields[1]), self._boot + int(fields[19]) / self._ticks
+        try:
+            p = psutil.Process(pid)
+            with p.oneshot():
+                return p.name(), p.ppid(), p.create_time()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return None
+
+    @staticmethod
+    def _full_name(pid, comm):
+        # The kernel truncates comm to 15 chars; like psutil, prefer the basename
+        # of argv[0] when it extends the truncated name.
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                argv0 = f.read().split(b"\0", 1)[0]
+        except OSError:
+            return comm
+        exe = os.path.basename(argv0.decode("utf-8", "replace"))
+        return exe if exe.startswith(comm) else comm
+
+    def scan(self):
+        now = time.time()
+        pids = self._pids()
+        batch = []
+        for pid in pids - self._prev:
+            info = self._info(pid)
+            if info is None:
+                pids.discard(pid)  # gone before we could read it
+                continue
+            self._known[pid] = info
+            name, ppid, start = info
+            batch.append({"type": "start", "pid": pid, "ppid": ppid, "name": name, "ts": _iso(start)})
+        for pid in self._prev - pids:
+            name, ppid, start = self._known.pop(pid, ("", None, None))
+            batch.append({"type": "exit", "pid": pid, "ppid": ppid, "name": name, "ts": _iso(now),
+                          "lifetime": round(now - start, 3) if start else None})
+        self._prev = pids
+        if batch:
+            with self._lock:
+                self._events.extend(batch)
+
+    def run(self):
+        # Baseline: processes already running produce no start events
+        for pid in self._pids():
+            info = self._info(pid)
+            if info is not None:
+                self._known[pid] = info
+                self._prev.add(pid)
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.scan()
+            except Exception as e:
+                logger.error(f"PID scan failed: {e}")
+
+    def drain(self):
+        with self._lock:
+            batch = list(self._events)
+            self._events.clear()
+        return batch
+
+    def requeue(self, batch):
+        with self._lock:
+            pending = batch + list(self._events)
+            self._events.clear()
+            self._events.extend(pending)
+
+# ---------------- Transport ----------------
+class TransportError(Exception):
+    pass
+
+_openers = {}
+
+def _urllib_opener(connect_timeout, read_timeout):
+    # urllib has a single socket timeout; these connection classes connect with
+    # connect_timeout and then switch the socket to read_timeout.
+    key = (connect_timeout, read_timeout)
+    if key not in _openers:
+        from http import client
+        from urllib import request
+
+        def split_timeouts(base):
+            class Connection(base):
+                def connect(self):
+                    super().connect()
+                    self.sock.settimeout(read_timeout)
+            return Connection
+
+        class HTTPHandler(request.HTTPHandler):
+            def http_open(self, req):
+                return self.do_open(split_timeouts(client.HTTPConnection), req)
+
+        class HTTPSHandler(request.HTTPSHandler):
+            def https_open(self, req):
+                return self.do_open(split_timeouts(client.HTTPSConnection), req, context=self._context)
+
+        _openers[key] = request.build_opener(HTTPHandler, HTTPSHandler)
+    return _openers[key]
+
+def _http_urllib(cfg, method, url, body, headers):
+    from http import client
+    from urllib import request, error
+    try:
+        req = request.Request(url, data=body, headers=headers, method=method)
+        opener = _urllib_opener(cfg["connect_timeout"], cfg["read_timeout"])
+        with opener.open(req, timeout=cfg["connect_timeout"]) as r:
+            return r.status, r.read(200).decode("utf-8", "replace")
+    except error.HTTPError as e:
+        return e.code, e.read(200).decode("utf-8", "replace")
+    except (error.URLError, client.HTTPException, OSError, ValueError) as e:
+        # ValueError: empty/malformed URL; HTTPException: BadStatusLine, IncompleteRead, ...
+        raise TransportError(e) from e
+
+def _http_requests(cfg, method, url, body, headers):
+    import requests  # only imported when transport = requests
+    try:
+        r = requests.request(method, url, headers=headers, data=body,
+                             timeout=(cfg["connect_timeout"], cfg["read_timeout"]))
+    except requests.RequestException as e:
+        raise TransportError(e) from e
+    return r.status_code, r.text[:200]
+
+def _http(cfg, method, url, body=None, headers=None):
+    send = _http_requests if cfg.get("transport") == "requests" else _http_urllib
+    return send(cfg, method, url, body, headers or {})
+
+def post_json(cfg, url, data):
     headers = {
         "Content-Type": "application/json",
         "X-API-Key": cfg["api_key"]
     }
+    body = json.dumps(data).encode("utf-8")
+    return _http(cfg, "POST", url, body, headers)
+
+# ---------------- Backend pool ----------------
+class Endpoint:
+    def __init__(self, url):
+        self.url = url
+        self.failures = 0
+        self.open_until = 0.0  # circuit open (skipped) until this monotonic time
+
+    def is_open(self, now):
+        return self.open_until > now
+
+class BackendPool:
+    """Ingest endpoints in this host's preference order, with a circuit breaker each.
+
+    The order comes from rendezvous (highest-random-weight) hashing of the
+    hostname, so hosts spread evenly over the endpoints, keep the same primary
+    across restarts, and only the hosts of a removed endpoint move elsewhere.
+    """
+
+    def __init__(self, cfg, hostname=None):
+        self.cfg = cfg
+        self.max_failures = cfg.get("breaker_failures", 3)
+        self.cooldown = cfg.get("breaker_cooldown", 30)
+        hostname = hostname or socket.gethostname()
+        urls = cfg.get("backend_urls") or [cfg["backend_url"]]
+        self.endpoints = [Endpoint(u) for u in sorted(urls, key=lambda u: self._weight(u, hostname), reverse=True)]
+
+    @staticmethod
+    def _weight(url, hostname):
+        return hashlib.sha1(f"{url}|{hostname}".encode("utf-8")).digest()
+
+    @property
+    def primary(self):
+        return self.endpoints[0]
+
+    def candidates(self):
+        """Closed endpoints in preference order; all of them if every circuit is open."""
+        now = time.monotonic()
+        healthy = [e for e in self.endpoints if not e.is_open(now)]
+        return healthy or list(self.endpoints)
+
+    def record_success(self, ep):
+        if ep.failures >= self.max_failures:
+            logger.info(f"Backend {ep.url} is healthy again")
+        ep.failures = 0
+        ep.open_until = 0.0
+
+    def record_failure(self, ep):
+        ep.failures += 1
+        if ep.failures >= self.max_failures:
+            if not ep.is_open(time.monotonic()):
+                logger.warning(f"Backend {ep.url} marked down after {ep.failures} failures")
+            ep.open_until = time.monotonic() + self.cooldown
+
+    def probe(self):
+        """Health-check endpoints whose cooldown expired (half-open).
+
+        Any HTTP answer below 500 means the server is up (the ingest URL only
+        accepts POST, so a GET normally returns 405). A failed probe keeps the
+        circuit open for another cooldown.
+        """
+        now = time.monotonic()
+        for ep in self.endpoints:
+            if ep.failures < self.max_failures or ep.is_open(now):
+                continue
+            try:
+                status, _ = _http(self.cfg, "GET", ep.url, headers={"X-API-Key": self.cfg["api_key"]})
+                ok = status < 500
+            except TransportError:
+                ok = False
+            if ok:
+                self.record_success(ep)
+            else:
+                ep.open_until = now + self.cooldown
+
+    def load_state(self, path=BREAKER_PATH):
+        """Restore circuit state saved by a previous run (wall-clock open_until)."""
+        try:
+            with open(path, encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(saved, dict):
+            return
+        offset = time.time() - time.monotonic()
+        for ep in self.endpoints:
+            state = saved.get(ep.url)
+            if isinstance(state, dict):
+                ep.failures = int(state.get("failures", 0))
+                ep.open_until = max(0.0, float(state.get("open_until", 0)) - offset)
+
+    def save_state(self, path=BREAKER_PATH):
+        offset = time.time() - time.monotonic()
+        state = {ep.url: {"failures": ep.failures, "open_until": ep.open_until + offset if ep.open_until else 0}
+                 for ep in self.endpoints if ep.failures}
+        try:
+            if not state:
+                if os.path.exists(path):
+                    os.remove(path)
+                return
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"Could not save backend state to {path}: {e}")
+
+# ---------------- Send data ----------------
+def send_snapshot(cfg, data, pool=None):
+    pool = pool or BackendPool(cfg, data.get("hostname"))
     attempts = 0
     backoff = 1.5
     while attempts < cfg["max_retries"]:
-        try:
-            r = requests.post(cfg["backend_url"], headers=headers, json=data,
-                            timeout=(cfg["connect_timeout"], cfg["read_timeout"]))
-            if r.status_code // 100 == 2:
-                logger.info(f"Snapshot sent successfully: {r.status_code}")
+        for ep in pool.candidates():
+            try:
+                status, text = post_json(cfg, ep.url, data)
+            except TransportError as e:
+                logger.error(f"POST to {ep.url} failed: {e}")
+                pool.record_failure(ep)
+                continue
+            if status // 100 == 2:
+                pool.record_success(ep)
+                if ep is not pool.primary:
+                    logger.info(f"Snapshot sent to fallback {ep.url}: {status}")
+                else:
+                    logger.info(f"Snapshot sent successfully: {status}")
                 return True
-            else:
-                logger.error(f"Server responded {r.status_code}: {r.text[:200]}")
-        except requests.RequestException as e:
-            logger.error(f"POST failed: {e}")
+            logger.error(f"Server {ep.url} responded {status}: {text[:200]}")
+            if status >= 500:
+                pool.record_failure(ep)
+                continue
+            break  # 4xx: the payload/key is the problem, another backend won't help
         attempts += 1
         time.sleep(backoff)
         backoff *= 2
     return False
 
+def events_url(url):
+    # .../api/v1/process-snapshots/ -> .../api/v1/process-events/
+    return url.rstrip("/").rsplit("/", 1)[0] + "/process-events/"
+
+def send_events(cfg, pool, hostname, watcher):
+    batch = watcher.drain()
+    if not batch:
+        return True
+    data = {"hostname": hostname, "events": batch}
+    for ep in pool.candidates():
+        try:
+            status, text = post_json(cfg, events_url(ep.url), data)
+        except TransportError as e:
+            logger.error(f"Event POST to {ep.url} failed: {e}")
+            pool.record_failure(ep)
+            continue
+        if status // 100 == 2:
+            pool.record_success(ep)
+            logger.info(f"Sent {len(batch)} process events")
+            return True
+        logger.error(f"Server {ep.url} responded {status} to events: {text[:200]}")
+        if status >= 500:
+            pool.record_failure(ep)
+            continue
+        return False  # 4xx: resending the same batch won't help
+    watcher.requeue(batch)
+    return False
+
 # ---------------- Main ----------------
+def pause(prompt):
+    # Keep a double-clicked console window open, but never block cron/CI runs.
+    if sys.stdin is not None and sys.stdin.isatty():
+        input(prompt)
+
 def main():
+    setup_logging()
     cfg = load_config()
     interval = cfg.get("interval_sec", 0)
+    pool = BackendPool(cfg)
+    if len(pool.endpoints) > 1:
+        logger.info(f"Primary backend {pool.primary.url} ({len(pool.endpoints)} configured)")
 
     if interval <= 0:
+        # One-shot runs keep the circuit breakers in a file, so a backend that
+        # is down is skipped by the next runs instead of costing a timeout each.
+        pool.load_state()
         data = make_payload()
-        send_snapshot(cfg, data)
-        input("Snapshot sent. Press Enter to exit...")  # keeps window open
+        send_snapshot(cfg, data, pool)
+        pool.save_state()
+        pause("Snapshot sent. Press Enter to exit...")
         return
 
     logger.info(f"Running continuously every {interval} sec")
+    watcher = None
+    if cfg["event_interval"] > 0:
+        watcher = LifecycleWatcher(cfg["event_interval"])
+        watcher.start()
+        logger.info(f"Watching process starts/exits every {cfg['event_interval'] * 1000:.0f} ms")
     while True:
+        pool.probe()
         data = make_payload()
-        send_snapshot(cfg, data)
+        send_snapshot(cfg, data, pool)
+        if watcher is not None:
+            send_events(cfg, pool, data["hostname"], watcher)
         time.sleep(interval)
 
 if __name__ == "__main__":
@@ -148,7 +511,7 @@ if __name__ == "__main__":
         main()
     except Exception as e:
         logger.exception(f"Fatal error: {e}")
-        input("Press Enter to exit...")
+        pause("Press Enter to exit...")
 
 
 
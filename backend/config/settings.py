@@ -68,6 +68,10 @@ REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': ['rest_framework.renderers.JSONRenderer'],
 }
 
+# How ingest stores a snapshot's processes: 'rows' (one Process row each) or
+# 'columnar' (one compressed ProcessColumns blob per snapshot). Reads handle both.
+SNAPSHOT_STORAGE = os.getenv('SNAPSHOT_STORAGE', 'rows')
+
 # Simple API key list (comma-separated in .env)
 AGENT_API_KEYS = [k for k in os.getenv('AGENT_API_KEYS', 'changeme').split(',') if k]
 
@@ -1,13 +1,80 @@
 from django.contrib import admin
-from .models import Snapshot, Process
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.html import format_html, format_html_join
+from .models import Snapshot, Process, ProcessName, ProcessEvent
+from . import search
 
 @admin.register(Snapshot)
 class SnapshotAdmin(admin.ModelAdmin):
-    list_display = ('id', 'hostname', 'created_at')
+    list_display = ('id', 'hostname', 'created_at', 'process_count')
     search_fields = ('hostname',)
+    readonly_fields = ('processes_table',)
+
+    def get_queryset(self, request):
+        # Leave the blob out of the changelist and count rows with one
+        # correlated subquery per listed snapshot instead of a COUNT each.
+        rows = (Process.objects.filter(snapshot=OuterRef('pk')).order_by()
+                .values('snapshot').annotate(n=Count('*')).values('n'))
+        return (super().get_queryset(request)
+                .select_related('columns').defer('columns__data')
+                .annotate(_process_count=Coalesce('columns__count', Subquery(rows), 0)))
+
+    @admin.display(description='Process count', ordering='_process_count')
+    def process_count(self, obj):
+        return obj._process_count
+
+    @admin.display(description='Processes')
+    def processes_table(self, obj):
+        # Works for both storage modes; columnar snapshots have no Process rows.
+        rows = format_html_join('', '<tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr>', (
+            (p.pid, p.ppid, p.name, p.cpu_percent, p.mem_rss) for p in obj.process_list
+        ))
+        return format_html('<table><tr><th>PID</th><th>PPID</th><th>Name</th><th>CPU %</th><th>RSS</th></tr>{}</table>', rows)
 
 @admin.register(Process)
 class ProcessAdmin(admin.ModelAdmin):
     list_display = ('snapshot', 'name', 'pid', 'ppid', 'cpu_percent', 'mem_percent')
     list_filter = ('snapshot__hostname',)
     search_fields = ('name',)
+
+    def get_search_results(self, request, queryset, search_term):
+        # Resolve the term through the name index to (host, names, seen range),
+        # then only read Process rows of that host's snapshots in that range.
+        if not search_term.strip():
+            return queryset, False
+        hits = {}
+        matches = search.filter_names(ProcessName.objects.all(), search_term).values_list(
+            'hostname', 'name', 'first_seen', 'last_seen')
+        for hostname, name, first_seen, last_seen in matches:
+            hit = hits.get(hostname)
+            if hit is None:
+                hits[hostname] = [{name}, first_seen, last_seen]
+            else:
+                hit[0].add(name)
+                hit[1] = min(hit[1], first_seen)
+                hit[2] = max(hit[2], last_seen)
+        if not hits:
+            return queryset.none(), False
+        q = Q()
+        for hostname, (names, first_seen, last_seen) in hits.items():
+            # last_seen is only refreshed every search.REFRESH
+            snaps = Snapshot.objects.filter(hostname=hostname,
+                                            created_at__range=(first_seen, last_seen + search.REFRESH))
+            q |= Q(snapshot__in=snaps.values('id'), name__in=names)
+        return queryset.filter(q), False
+
+@admin.register(ProcessName)
+class ProcessNameAdmin(admin.ModelAdmin):
+    list_display = ('name', 'hostname', 'first_seen', 'last_seen', 'snapshot_count')
+    list_filter = ('hostname',)
+    search_fields = ('name',)
+
+    def get_search_results(self, request, queryset, search_term):
+        return search.filter_names(queryset, search_term), False
+
+@admin.register(ProcessEvent)
+class ProcessEventAdmin(admin.ModelAdmin):
+    list_display = ('ts', 'hostname', 'kind', 'name', 'pid', 'ppid', 'lifetime')
+    list_filter = ('kind', 'hostname')
+    date_hierarchy = 'ts'
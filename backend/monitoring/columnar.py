@@ -0,0 +1,117 @@
+"""Columnar encoding for a snapshot's process list.
+
+Instead of one ``Process`` row per process, the columnar storage mode keeps a
+snapshot's processes as a single zlib-compressed blob of typed arrays::
+
+    header   '<4sBII'  magic, version, process count, name-table byte length
+    names    UTF-8 process names joined by NUL (the name dictionary)
+    pid      int32[n]
+    ppid     int32[n]
+    name     uint32[n]   index into the name dictionary
+    cpu      float64[n]  NaN = null
+    rss      int64[n]    -1 = null
+    memp     float64[n]  NaN = null
+
+Arrays are little-endian. Decoding is only done when a read path asks for the
+processes, and rows are handed out as lightweight ``ProcessRow`` tuples that
+expose the same attributes as ``Process``.
+"""
+import math
+import struct
+import sys
+import zlib
+from array import array
+from collections import namedtuple
+
+MAGIC = b'PCOL'
+VERSION = 1
+_HEADER = struct.Struct('<4sBII')
+
+# (field, array typecode) in blob order
+_COLUMNS = (
+    ('pid', 'i'),
+    ('ppid', 'i'),
+    ('name', 'I'),
+    ('cpu_percent', 'd'),
+    ('mem_rss', 'q'),
+    ('mem_percent', 'd'),
+)
+
+FIELDS = ('pid', 'ppid', 'name', 'cpu_percent', 'mem_rss', 'mem_percent')
+
+ProcessRow = namedtuple('ProcessRow', FIELDS)
+
+_NAN = float('nan')
+_SWAP = sys.byteorder != 'little'
+
+
+def encode(rows, level=6):
+    """Encode ``(pid, ppid, name, cpu_percent, mem_rss, mem_percent)`` tuples."""
+    names, name_ids = [], {}
+    cols = {field: array(code) for field, code in _COLUMNS}
+    pid, ppid, name_col = cols['pid'], cols['ppid'], cols['name']
+    cpu, rss, memp = cols['cpu_percent'], cols['mem_rss'], cols['mem_percent']
+    for p, pp, name, c, r, m in rows:
+        idx = name_ids.get(name)
+        if idx is None:
+            idx = name_ids[name] = len(names)
+            names.append(name)
+        pid.append(p)
+        ppid.append(pp)
+        name_col.append(idx)
+        cpu.append(_NAN if c is None else c)
+        rss.append(-1 if r is None else r)
+        memp.append(_NAN if m is None else m)
+
+    name_bytes = '\0'.join(names).encode('utf-8')
+    parts = [_HEADER.pack(MAGIC, VERSION, len(pid), len(name_bytes)), name_bytes]
+    for field, _ in _COLUMNS:
+        col = cols[field]
+        if _SWAP:
+            col.byteswap()
+        parts.append(col.tobytes())
+    return zlib.compress(b''.join(parts), level)
+
+
+class Columns:
+    """Decoded column arrays of one snapshot."""
+
+    def __init__(self, blob):
+        raw = zlib.decompress(blob)
+        magic, version, n, name_len = _HEADER.unpack_from(raw)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('Not a process column blob')
+        offset = _HEADER.size
+        self.names = raw[offset:offset + name_len].decode('utf-8').split('\0') if name_len else ['']
+        offset += name_len
+        self.count = n
+        for field, code in _COLUMNS:
+            col = array(code)
+            size = n * col.itemsize
+            col.frombytes(raw[offset:offset + size])
+            if _SWAP:
+                col.byteswap()
+            setattr(self, field, col)
+            offset += size
+
+    def column(self, field):
+        if field == 'name':
+            names = self.names
+            return [names[i] for i in self.name]
+        col = getattr(self, field)
+        if field == 'mem_rss':
+            return [None if v < 0 else v for v in col]
+        if field in ('cpu_percent', 'mem_percent'):
+            return [None if math.isnan(v) else v for v in col]
+        return col.tolist()
+
+    def values_list(self, *fields):
+        """Same tuples ``Process.objects.values_list(*fields)`` would return."""
+        return list(zip(*(self.column(f) for f in fields)))
+
+    def rows(self):
+        return [ProcessRow._make(t) for t in self.values_list(*FIELDS)]
+
+
+def decode(blob):
+    return Columns(blob)
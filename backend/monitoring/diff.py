@@ -0,0 +1,99 @@
+"""Server-side diff between two snapshots.
+
+Snapshots never change after ingest, so a diff is a pure function of the two
+ids and is kept in a bounded LRU. They can be deleted, though (admin, any
+worker), so every lookup first checks that both ids still exist with one
+indexed COUNT before a cached result is served.
+
+To keep cache entries small, only the first SNAPSHOT_DIFF_MAX_LIMIT entries
+of each list are kept, as plain tuples, together with the full totals;
+``limited()`` turns them into response dicts.
+"""
+import heapq
+from functools import lru_cache
+
+from django.conf import settings
+
+from .models import Snapshot
+
+_FIELDS = ('pid', 'name', 'ppid', 'cpu_percent', 'mem_rss')
+
+MAX_LIMIT = getattr(settings, 'SNAPSHOT_DIFF_MAX_LIMIT', 500)
+
+# Field names of the tuples stored for each list
+_SHAPES = {
+    'started': ('pid', 'name', 'ppid', 'cpu_percent', 'mem_rss'),
+    'exited': ('pid', 'name', 'ppid', 'cpu_percent', 'mem_rss'),
+    'ppid_changed': ('pid', 'name', 'old_ppid', 'new_ppid'),
+    'cpu_deltas': ('pid', 'name', 'old', 'new', 'delta'),
+    'rss_deltas': ('pid', 'name', 'old', 'new', 'delta'),
+}
+
+
+def _rows(snapshot_id):
+    """{(pid, name): (ppid, cpu, rss)} for one snapshot."""
+    return {
+        (pid, name): (ppid, cpu or 0.0, rss or 0)
+        for pid, name, ppid, cpu, rss in
+        Snapshot.process_values(snapshot_id, *_FIELDS)
+    }
+
+
+def snapshot_diff(old_id, new_id):
+    """Diff ``old_id`` -> ``new_id``. Raises Snapshot.DoesNotExist (not cached)."""
+    if Snapshot.objects.filter(pk__in=(old_id, new_id)).count() != len({old_id, new_id}):
+        raise Snapshot.DoesNotExist
+    return _diff(old_id, new_id)
+
+
+@lru_cache(maxsize=getattr(settings, 'SNAPSHOT_DIFF_CACHE_SIZE', 128))
+def _diff(old_id, new_id):
+    snaps = {s.id: s for s in Snapshot.objects.filter(pk__in=(old_id, new_id))}
+    if old_id not in snaps or new_id not in snaps:
+        raise Snapshot.DoesNotExist
+    old, new = _rows(old_id), _rows(new_id)
+
+    started, ppid_changed, cpu, rss = [], [], [], []
+    for key, (ppid, c, r) in new.items():
+        prev = old.get(key)
+        if prev is None:
+            started.append((key[0], key[1], ppid, c, r))
+            continue
+        if prev[0] != ppid:
+            ppid_changed.append((key[0], key[1], prev[0], ppid))
+        cpu.append((key[0], key[1], prev[1], c, c - prev[1]))
+        rss.append((key[0], key[1], prev[2], r, r - prev[2]))
+    exited = [(pid, name, ppid, c, r)
+              for (pid, name), (ppid, c, r) in old.items() if (pid, name) not in new]
+
+    by_pid = lambda t: t[0]
+    by_delta = lambda t: abs(t[4])
+    lists = {
+        'started': heapq.nsmallest(MAX_LIMIT, started, key=by_pid),
+        'exited': heapq.nsmallest(MAX_LIMIT, exited, key=by_pid),
+        'ppid_changed': heapq.nsmallest(MAX_LIMIT, ppid_changed, key=by_pid),
+        'cpu_deltas': heapq.nlargest(MAX_LIMIT, cpu, key=by_delta),
+        'rss_deltas': heapq.nlargest(MAX_LIMIT, rss, key=by_delta),
+    }
+    totals = {'started': len(started), 'exited': len(exited), 'ppid_changed': len(ppid_changed),
+              'cpu_deltas': len(cpu), 'rss_deltas': len(rss)}
+    return {
+        'old': {'id': str(old_id), 'hostname': snaps[old_id].hostname,
+                'created_at': snaps[old_id].created_at, 'count': len(old)},
+        'new': {'id': str(new_id), 'hostname': snaps[new_id].hostname,
+                'created_at': snaps[new_id].created_at, 'count': len(new)},
+        'totals': totals,
+        **{key: tuple(items) for key, items in lists.items()},
+    }
+
+
+def limited(diff, limit):
+    """Response dict for ``diff`` with every list cut to ``limit`` entries (plus totals).
+
+    ``limit`` is clamped to 0..SNAPSHOT_DIFF_MAX_LIMIT.
+    """
+    limit = max(0, min(limit, MAX_LIMIT))
+    out = {'old': diff['old'], 'new': diff['new'], 'totals': dict(diff['totals'])}
+    for key, fields in _SHAPES.items():
+        out[key] = [dict(zip(fields, item)) for item in diff[key][:limit]]
+    return out
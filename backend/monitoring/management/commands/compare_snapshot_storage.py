@@ -0,0 +1,103 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from monitoring import columnar
+from monitoring.models import Snapshot, Process, ProcessColumns
+
+
+def _ms(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def _insert_ms(insert, repeat):
+    """Best time of ``insert(snapshot)`` into a fresh snapshot; every attempt is rolled back."""
+    best = float('inf')
+    for _ in range(repeat):
+        with transaction.atomic():
+            snapshot = Snapshot.objects.create(hostname='compare-snapshot-storage')
+            t0 = time.perf_counter()
+            insert(snapshot)
+            best = min(best, time.perf_counter() - t0)
+            transaction.set_rollback(True)
+    return best * 1000
+
+
+class Command(BaseCommand):
+    help = "Compare storage size and read/write latency of Process rows vs columnar blobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sample', type=int, default=20, help="Number of recent row-stored snapshots")
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **opts):
+        ids = list(Snapshot.objects.filter(columns__isnull=True)
+                   .order_by('-created_at').values_list('id', flat=True)[:opts['sample']])
+        if not ids:
+            self.stdout.write("No row-stored snapshots to sample.")
+        else:
+            self._compare(ids, opts['repeat'])
+
+        blobs = ProcessColumns.objects.count()
+        if blobs:
+            self.stdout.write(f"\nStored columnar snapshots: {blobs}")
+        self._table_sizes()
+
+    def _compare(self, ids, repeat):
+        procs = blob_bytes = 0
+        read_rows = encode = decode = write_rows = write_blob = 0.0
+        for snapshot_id in ids:
+            rows = Snapshot.process_values(snapshot_id, *columnar.FIELDS)
+            blob = columnar.encode(rows)
+            procs += len(rows)
+            blob_bytes += len(blob)
+            read_rows += _ms(lambda: list(Process.objects.filter(snapshot_id=snapshot_id)
+                                          .values_list(*columnar.FIELDS)), repeat)
+            encode += _ms(lambda: columnar.encode(rows), repeat)
+            decode += _ms(lambda: columnar.decode(blob).rows(), repeat)
+            write_rows += _insert_ms(lambda snap: Process.objects.bulk_create([Process(
+                snapshot=snap, pid=pid, ppid=ppid, name=name, cpu_percent=cpu, mem_rss=rss, mem_percent=memp,
+            ) for pid, ppid, name, cpu, rss, memp in rows], batch_size=1000), repeat)
+            write_blob += _insert_ms(lambda snap: ProcessColumns.objects.create(
+                snapshot=snap, count=len(rows), data=columnar.encode(rows)), repeat)
+
+        n = len(ids)
+        # Per row: id, fk, pid, ppid, name, 3 nullable numbers, plus one entry in
+        # each of the three indexes: the snapshot FK and the (snapshot, pid/ppid)
+        # composites. A lower bound; the real figure depends on the engine's page
+        # and record overhead.
+        names = sum(len(name.encode('utf-8'))
+                    for name in Process.objects.filter(snapshot_id__in=ids).values_list('name', flat=True))
+        row_bytes = (procs * (8 + 8 + 4 + 4 + 8 + 8 + 8) + names
+                     + procs * (8 + 8) + procs * 2 * (8 + 8 + 4))
+
+        self.stdout.write(f"Sampled {n} snapshots, {procs} processes ({procs / n:.0f}/snapshot)")
+        self.stdout.write(f"  rows:     ~{row_bytes / n / 1024:.1f} KiB/snapshot (payload + index estimate), "
+                          f"{procs / n:.0f} inserts + {3 * procs / n:.0f} index entries")
+        self.stdout.write(f"  columnar: {blob_bytes / n / 1024:.1f} KiB/snapshot, 1 insert + 1 index entry "
+                          f"({row_bytes / max(blob_bytes, 1):.1f}x smaller)")
+        self.stdout.write(f"  write rows (bulk_create):    {write_rows / n:.2f} ms/snapshot")
+        self.stdout.write(f"  write blob (encode+insert):  {write_blob / n:.2f} ms/snapshot")
+        self.stdout.write("  (writes timed inside rolled-back transactions, so without the commit)")
+        self.stdout.write(f"  read rows (ORM values_list): {read_rows / n:.2f} ms/snapshot")
+        self.stdout.write(f"  encode blob:                 {encode / n:.2f} ms/snapshot")
+        self.stdout.write(f"  decode blob to ProcessRow:   {decode / n:.2f} ms/snapshot")
+
+    def _table_sizes(self):
+        if connection.vendor != 'sqlite':
+            return
+        with connection.cursor() as cur:
+            try:
+                cur.execute("SELECT name, SUM(pgsize) FROM dbstat WHERE name LIKE 'monitoring_%' GROUP BY name")
+            except Exception:
+                return  # SQLite built without the dbstat virtual table
+            rows = cur.fetchall()
+        self.stdout.write("\nOn-disk size (SQLite dbstat):")
+        for name, size in sorted(rows):
+            self.stdout.write(f"  {name:45s} {size / 1024:10.1f} KiB")
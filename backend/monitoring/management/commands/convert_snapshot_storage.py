@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from monitoring import columnar
+from monitoring.models import Snapshot, Process, ProcessColumns
+
+
+class Command(BaseCommand):
+    help = "Convert stored snapshots between Process rows and columnar blobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--to', choices=('columnar', 'rows'), required=True)
+        parser.add_argument('--hostname', help="Only convert snapshots of this host")
+        parser.add_argument('--limit', type=int, default=0, help="Stop after N snapshots (0 = all)")
+
+    def handle(self, *args, **opts):
+        qs = Snapshot.objects.order_by('created_at')
+        if opts['hostname']:
+            qs = qs.filter(hostname=opts['hostname'])
+        if opts['to'] == 'columnar':
+            qs = qs.filter(columns__isnull=True)
+            convert = self._to_columnar
+        else:
+            qs = qs.filter(columns__isnull=False)
+            convert = self._to_rows
+        ids = qs.values_list('id', flat=True)
+        if opts['limit']:
+            ids = ids[:opts['limit']]
+
+        done = 0
+        for snapshot_id in ids.iterator():
+            with transaction.atomic():
+                convert(snapshot_id)
+            done += 1
+            if done % 100 == 0:
+                self.stdout.write(f"{done} snapshots converted")
+        self.stdout.write(self.style.SUCCESS(f"Converted {done} snapshots to {opts['to']}"))
+
+    def _to_columnar(self, snapshot_id):
+        rows = Snapshot.process_values(snapshot_id, *columnar.FIELDS)
+        ProcessColumns.objects.create(snapshot_id=snapshot_id, count=len(rows), data=columnar.encode(rows))
+        Process.objects.filter(snapshot_id=snapshot_id).delete()
+
+    def _to_rows(self, snapshot_id):
+        rows = Snapshot.process_values(snapshot_id, *columnar.FIELDS)
+        Process.objects.bulk_create([Process(
+            snapshot_id=snapshot_id,
+            pid=pid,
+            ppid=ppid,
+            name=name,
+            cpu_percent=cpu,
+            mem_rss=rss,
+            mem_percent=memp,
+        ) for pid, ppid, name, cpu, rss, memp in rows], batch_size=1000)
+        ProcessColumns.objects.filter(snapshot_id=snapshot_id).delete()
@@ -0,0 +1,40 @@
+from django.db import transaction
+from django.db.models import Count, Max, Min
+from django.core.management.base import BaseCommand
+
+from monitoring import columnar
+from monitoring.models import Process, ProcessColumns, ProcessName
+
+
+class Command(BaseCommand):
+    help = "Rebuild the process-name search index from stored snapshots."
+
+    def handle(self, *args, **opts):
+        seen = {}  # (hostname, name) -> [first_seen, last_seen, snapshot_count]
+
+        rows = (Process.objects.values('snapshot__hostname', 'name')
+                .annotate(first=Min('snapshot__created_at'), last=Max('snapshot__created_at'),
+                          n=Count('snapshot_id', distinct=True)))
+        for r in rows.iterator():
+            seen[r['snapshot__hostname'], r['name']] = [r['first'], r['last'], r['n']]
+
+        blobs = ProcessColumns.objects.select_related('snapshot').only(
+            'data', 'snapshot__hostname', 'snapshot__created_at')
+        for cols in blobs.iterator(chunk_size=100):
+            snap = cols.snapshot
+            for name in set(columnar.decode(cols.data).column('name')):
+                entry = seen.get((snap.hostname, name))
+                if entry is None:
+                    seen[snap.hostname, name] = [snap.created_at, snap.created_at, 1]
+                else:
+                    entry[0] = min(entry[0], snap.created_at)
+                    entry[1] = max(entry[1], snap.created_at)
+                    entry[2] += 1
+
+        with transaction.atomic():
+            ProcessName.objects.all().delete()
+            ProcessName.objects.bulk_create([
+                ProcessName(hostname=h, name=n, first_seen=f, last_seen=l, snapshot_count=c)
+                for (h, n), (f, l, c) in seen.items()
+            ], batch_size=1000)
+        self.stdout.write(self.style.SUCCESS(f"Indexed {len(seen)} (host, name) pairs"))
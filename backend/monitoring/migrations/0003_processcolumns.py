@@ -0,0 +1,22 @@
+# Generated by Django 5.0.6 on 2026-10-19 19:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0002_alter_process_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessColumns',
+            fields=[
+                ('snapshot', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='columns', serialize=False, to='monitoring.snapshot')),
+                ('count', models.IntegerField()),
+                ('data', models.BinaryField()),
+            ],
+        ),
+    ]
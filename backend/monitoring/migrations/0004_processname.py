@@ -0,0 +1,97 @@
+# Generated by Django 5.0.6 on 2026-10-19 20:02
+
+from django.db import migrations, models
+from django.db.utils import DatabaseError
+
+SQLITE_FORWARD = [
+    """CREATE VIRTUAL TABLE monitoring_processname_fts USING fts5(
+        name, content='monitoring_processname', content_rowid='id', tokenize='trigram')""",
+    """CREATE TRIGGER monitoring_processname_ai AFTER INSERT ON monitoring_processname BEGIN
+        INSERT INTO monitoring_processname_fts(rowid, name) VALUES (new.id, new.name);
+    END""",
+    """CREATE TRIGGER monitoring_processname_ad AFTER DELETE ON monitoring_processname BEGIN
+        INSERT INTO monitoring_processname_fts(monitoring_processname_fts, rowid, name)
+        VALUES ('delete', old.id, old.name);
+    END""",
+    """CREATE TRIGGER monitoring_processname_au AFTER UPDATE OF name ON monitoring_processname BEGIN
+        INSERT INTO monitoring_processname_fts(monitoring_processname_fts, rowid, name)
+        VALUES ('delete', old.id, old.name);
+        INSERT INTO monitoring_processname_fts(rowid, name) VALUES (new.id, new.name);
+    END""",
+]
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS monitoring_processname_ai",
+    "DROP TRIGGER IF EXISTS monitoring_processname_ad",
+    "DROP TRIGGER IF EXISTS monitoring_processname_au",
+    "DROP TABLE IF EXISTS monitoring_processname_fts",
+]
+# Django compiles icontains on PostgreSQL to UPPER("name"::text) LIKE UPPER(%s),
+# so the trigram index is on that expression rather than on the bare column.
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """CREATE INDEX IF NOT EXISTS monitoring_processname_name_upper_trgm
+        ON monitoring_processname USING gin ((UPPER(name::text)) gin_trgm_ops)""",
+]
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS monitoring_processname_name_upper_trgm",
+]
+
+
+def _run(schema_editor, statements):
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        try:
+            with schema_editor.connection.cursor() as cur:
+                cur.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x, tokenize='trigram')")
+                cur.execute("DROP TABLE temp.fts5_probe")
+        except DatabaseError:
+            return  # SQLite without FTS5/trigram; search falls back to LIKE on ProcessName
+        _run(schema_editor, SQLITE_FORWARD)
+    elif vendor == 'postgresql':
+        with schema_editor.connection.cursor() as cur:
+            cur.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+            if cur.fetchone() is None:
+                return  # contrib not installed; search falls back to a plain scan of ProcessName
+        _run(schema_editor, POSTGRES_FORWARD)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _run(schema_editor, SQLITE_REVERSE)
+    elif vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_REVERSE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0003_processcolumns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessName',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hostname', models.CharField(max_length=255)),
+                ('name', models.CharField(max_length=255)),
+                ('first_seen', models.DateTimeField()),
+                ('last_seen', models.DateTimeField(db_index=True)),
+                ('snapshot_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-last_seen'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='processname',
+            constraint=models.UniqueConstraint(fields=('hostname', 'name'), name='monitoring_processname_host_name'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.0.6 on 2026-10-19 20:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('monitoring', '0004_processname'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hostname', models.CharField(max_length=255)),
+                ('kind', models.PositiveSmallIntegerField(choices=[(1, 'start'), (2, 'exit')])),
+                ('pid', models.IntegerField()),
+                ('ppid', models.IntegerField(blank=True, null=True)),
+                ('name', models.CharField(blank=True, max_length=255)),
+                ('ts', models.DateTimeField(db_index=True)),
+                ('lifetime', models.FloatField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['ts'],
+                'indexes': [models.Index(fields=['hostname', 'ts'], name='monitoring__hostnam_ee4815_idx')],
+            },
+        ),
+    ]
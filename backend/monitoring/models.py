@@ -1,5 +1,9 @@
 import uuid
+from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
+from django.utils.functional import cached_property
+
+from . import columnar
 
 class Snapshot(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -12,6 +16,35 @@ class Snapshot(models.Model):
     def __str__(self):
         return f"{self.hostname} @ {self.created_at.isoformat()}"
 
+    def _columns(self):
+        try:
+            return self.columns
+        except ObjectDoesNotExist:
+            return None
+
+    @cached_property
+    def process_list(self):
+        """Processes of this snapshot, decoded from the column blob or read from Process rows."""
+        cols = self._columns()
+        if cols is not None:
+            return columnar.decode(cols.data).rows()
+        return list(self.processes.all())
+
+    @property
+    def process_count(self):
+        cols = self._columns()
+        if cols is not None:
+            return cols.count
+        return self.processes.count()
+
+    @staticmethod
+    def process_values(snapshot_id, *fields):
+        """``values_list(*fields)`` tuples for one snapshot, whichever storage holds it."""
+        blob = ProcessColumns.objects.filter(snapshot_id=snapshot_id).values_list('data', flat=True).first()
+        if blob is not None:
+            return columnar.decode(blob).values_list(*fields)
+        return list(Process.objects.filter(snapshot_id=snapshot_id).values_list(*fields))
+
 class Process(models.Model):
     snapshot = models.ForeignKey(Snapshot, on_delete=models.CASCADE, related_name='processes')
     pid = models.IntegerField()
@@ -29,3 +62,52 @@ class Process(models.Model):
 
     def __str__(self):
         return f"{self.name}({self.pid})"
+
+class ProcessColumns(models.Model):
+    """A snapshot's whole process list as one compressed column blob (see columnar.py)."""
+    snapshot = models.OneToOneField(Snapshot, on_delete=models.CASCADE, primary_key=True, related_name='columns')
+    count = models.IntegerField()
+    data = models.BinaryField()
+
+    def __str__(self):
+        return f"{self.snapshot_id} ({self.count} processes, {len(self.data)} bytes)"
+
+class ProcessName(models.Model):
+    """One row per (host, process name) ever seen; the name search index is built on this table."""
+    hostname = models.CharField(max_length=255)
+    name = models.CharField(max_length=255)
+    first_seen = models.DateTimeField()
+    last_seen = models.DateTimeField(db_index=True)
+    snapshot_count = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['-last_seen']
+        constraints = [
+            models.UniqueConstraint(fields=['hostname', 'name'], name='monitoring_processname_host_name'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} on {self.hostname}"
+
+class ProcessEvent(models.Model):
+    """A process start or exit seen by the agent's PID watcher between full snapshots."""
+    START = 1
+    EXIT = 2
+    KIND_CHOICES = [(START, 'start'), (EXIT, 'exit')]
+
+    hostname = models.CharField(max_length=255)
+    kind = models.PositiveSmallIntegerField(choices=KIND_CHOICES)
+    pid = models.IntegerField()
+    ppid = models.IntegerField(null=True, blank=True)
+    name = models.CharField(max_length=255, blank=True)
+    ts = models.DateTimeField(db_index=True)
+    lifetime = models.FloatField(null=True, blank=True)  # seconds, exit events only
+
+    class Meta:
+        ordering = ['ts']
+        indexes = [
+            models.Index(fields=['hostname', 'ts']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.name}({self.pid}) on {self.hostname}"
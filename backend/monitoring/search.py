@@ -0,0 +1,89 @@
+"""Process-name search over history.
+
+Ingest keeps one ``ProcessName`` row per (host, name) with first/last seen
+and a snapshot count. Name lookups go through an index on that table instead
+of ``LIKE '%x%'`` over every ``Process`` row:
+
+* SQLite: FTS5 virtual table with the trigram tokenizer, synced by triggers
+  (migration 0004).
+* PostgreSQL: pg_trgm GIN index on ``UPPER(name::text)`` (migration 0004),
+  the expression Django's ``icontains`` compiles to, so the planner can use it.
+
+Queries shorter than three characters cannot use a trigram index and fall
+back to ``icontains`` on ``ProcessName``, which is still far smaller than the
+Process table.
+
+To keep ingest from rewriting every known row, ``last_seen`` is only moved
+forward once it is PROCESS_NAME_REFRESH_SECONDS old, so it can lag by up to
+that much. At each refresh ``snapshot_count`` grows by the host's snapshots
+since the previous refresh (one COUNT per host), which overcounts names that
+came and went within that window.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F
+from django.db.models.expressions import RawSQL
+
+from .models import ProcessName, Snapshot
+
+FTS_TABLE = 'monitoring_processname_fts'
+
+REFRESH = timedelta(seconds=getattr(settings, 'PROCESS_NAME_REFRESH_SECONDS', 60))
+
+_fts_available = None
+
+
+def _has_fts():
+    global _fts_available
+    if _fts_available is None:
+        _fts_available = (connection.vendor == 'sqlite'
+                          and FTS_TABLE in connection.introspection.table_names())
+    return _fts_available
+
+
+def _fts_phrase(term):
+    return '"' + term.replace('"', '""') + '"'
+
+
+def filter_names(queryset, term):
+    """Restrict a ProcessName queryset to names containing ``term`` (case-insensitive)."""
+    term = term.strip()
+    if not term:
+        return queryset
+    if len(term) >= 3 and _has_fts():
+        return queryset.filter(id__in=RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (_fts_phrase(term),)))
+    return queryset.filter(name__icontains=term)
+
+
+def search(term, hostname=None):
+    qs = ProcessName.objects.all()
+    if hostname:
+        qs = qs.filter(hostname=hostname)
+    return filter_names(qs, term)
+
+
+def record_names(hostname, seen_at, names):
+    """Upsert the (host, name) rows for one ingested snapshot."""
+    names = set(names)
+    if not names:
+        return
+    known = dict(ProcessName.objects.filter(hostname=hostname, name__in=names)
+                 .values_list('name', 'last_seen'))
+    due = defaultdict(list)  # previous last_seen -> names to refresh
+    for name, last_seen in known.items():
+        if last_seen <= seen_at - REFRESH:
+            due[last_seen].append(name)
+    for last_seen, due_names in due.items():
+        seen = Snapshot.objects.filter(hostname=hostname, created_at__gt=last_seen,
+                                       created_at__lte=seen_at).count()
+        # Matching on last_seen lets only one of two concurrent ingests count the span.
+        ProcessName.objects.filter(hostname=hostname, name__in=due_names, last_seen=last_seen).update(
+            last_seen=seen_at, snapshot_count=F('snapshot_count') + max(seen, 1))
+    ProcessName.objects.bulk_create([
+        ProcessName(hostname=hostname, name=name, first_seen=seen_at, last_seen=seen_at, snapshot_count=1)
+        for name in names - known.keys()
+    ], batch_size=1000, ignore_conflicts=True)
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Snapshot, Process
+from .models import Snapshot, Process, ProcessEvent
 
 class ProcessInSerializer(serializers.Serializer):
     pid = serializers.IntegerField()
@@ -14,14 +14,33 @@ class SnapshotInSerializer(serializers.Serializer):
     created_at = serializers.DateTimeField(required=False)
     processes = ProcessInSerializer(many=True)
 
+class ProcessEventInSerializer(serializers.Serializer):
+    type = serializers.ChoiceField(choices=('start', 'exit'))
+    pid = serializers.IntegerField()
+    ppid = serializers.IntegerField(required=False, allow_null=True)
+    name = serializers.CharField(required=False, allow_blank=True, default='')
+    ts = serializers.DateTimeField()
+    lifetime = serializers.FloatField(required=False, allow_null=True)
+
+class ProcessEventBatchInSerializer(serializers.Serializer):
+    hostname = serializers.CharField()
+    events = ProcessEventInSerializer(many=True)
+
 class ProcessOutSerializer(serializers.ModelSerializer):
     class Meta:
         model = Process
         fields = ('pid','ppid','name','cpu_percent','mem_rss','mem_percent')
 
 class SnapshotOutSerializer(serializers.ModelSerializer):
-    processes = ProcessOutSerializer(many=True)
+    processes = ProcessOutSerializer(many=True, source='process_list')
 
     class Meta:
         model = Snapshot
         fields = ('id','hostname','created_at','processes')
+
+class ProcessEventOutSerializer(serializers.ModelSerializer):
+    type = serializers.CharField(source='get_kind_display')
+
+    class Meta:
+        model = ProcessEvent
+        fields = ('hostname', 'type', 'pid', 'ppid', 'name', 'ts', 'lifetime')
@@ -0,0 +1,237 @@
+"""In-memory index of the current top CPU / RSS consumers.
+
+Ingest feeds every accepted snapshot into ``index.update()``; the index keeps,
+per host and fleet-wide, the top-K processes of each host's *latest* snapshot
+plus EWMA-smoothed values per (host, process name). An update only rebuilds
+that host's bounded top-K lists, so its cost does not depend on fleet size; a
+fleet-wide query merges the sorted per-host heads with ``heapq.merge`` and
+stops after ``limit`` items, without touching the database.
+
+The index lives in each worker process. The first update or query starts a
+background thread that loads recent history from the database and then,
+every TOP_CONSUMERS_SYNC_INTERVAL_SECONDS, catches up on snapshots other
+workers ingested: the newest one per host above its high-water mark, minus a
+small lag for transactions that committed late. Requests never wait on that
+work, so a query right after startup may see a partial ranking. Hosts
+without a snapshot in the last TOP_CONSUMERS_STALE_SECONDS drop out.
+"""
+import heapq
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from itertools import islice
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .models import Snapshot
+
+logger = logging.getLogger(__name__)
+
+METRICS = ('cpu', 'rss')
+
+# A name missing from this many consecutive snapshots is dropped from the
+# smoothed ranking instead of being decayed forever.
+_MAX_MISSES = 3
+
+
+class _HostState:
+    __slots__ = ('created_at', 'top', 'ewma')
+
+    def __init__(self):
+        self.created_at = None
+        # (metric, smoothed) -> up to K ranking tuples, sorted best first
+        self.top = {}
+        # process name -> [cpu, rss, misses]
+        self.ewma = {}
+
+
+class TopConsumerIndex:
+    def __init__(self, k=None, alpha=None, warmup=None):
+        self.k = k or getattr(settings, 'TOP_CONSUMERS_K', 50)
+        self.alpha = alpha or getattr(settings, 'TOP_CONSUMERS_EWMA_ALPHA', 0.3)
+        self.warmup = warmup or getattr(settings, 'TOP_CONSUMERS_WARMUP_SNAPSHOTS', 10)
+        self.stale = timedelta(seconds=getattr(settings, 'TOP_CONSUMERS_STALE_SECONDS', 300))
+        self.sync_lag = timedelta(seconds=getattr(settings, 'TOP_CONSUMERS_SYNC_LAG_SECONDS', 5))
+        self.sync_every = getattr(settings, 'TOP_CONSUMERS_SYNC_INTERVAL_SECONDS', 1.0)
+        self._lock = threading.RLock()
+        self._owner = None  # pid that started the sync thread
+        self._high_water = None  # newest created_at applied
+        # hostname -> _HostState, least recently updated first (for eviction)
+        self._hosts = OrderedDict()
+
+    # ---------------- Updates ----------------
+    def update(self, hostname, created_at, processes):
+        """Apply one snapshot. ``processes`` yields (pid, name, cpu, rss)."""
+        self._ensure_started()
+        with self._lock:
+            self._apply(hostname, created_at, processes)
+
+    def _apply(self, hostname, created_at, processes):
+        host = self._hosts.get(hostname)
+        if host is None:
+            host = self._hosts[hostname] = _HostState()
+        elif host.created_at is not None and created_at <= host.created_at:
+            return  # older (or already applied) snapshot; keep the newer one
+
+        host.created_at = created_at
+        self._hosts.move_to_end(hostname)
+        if self._high_water is None or created_at > self._high_water:
+            self._high_water = created_at
+        rows = [(pid, name, cpu or 0.0, rss or 0) for pid, name, cpu, rss in processes]
+
+        # Raw rankings from the snapshot itself
+        for metric, col in (('cpu', 2), ('rss', 3)):
+            best = heapq.nlargest(self.k, rows, key=lambda r: r[col])
+            host.top[(metric, False)] = sorted((-r[col], hostname, r[1], r[0]) for r in best)
+
+        # Smoothed rankings per process name
+        totals = {}
+        for pid, name, cpu, rss in rows:
+            t = totals.get(name)
+            if t is None:
+                totals[name] = [cpu, rss]
+            else:
+                t[0] += cpu
+                t[1] += rss
+
+        a = self.alpha
+        for name, (cpu, rss) in totals.items():
+            prev = host.ewma.get(name)
+            if prev is None:
+                # Seed with the first sample; starting from zero would rank
+                # new hosts and names far below their real usage for ~1/a ticks.
+                host.ewma[name] = [cpu, rss, 0]
+            else:
+                prev[0] += a * (cpu - prev[0])
+                prev[1] += a * (rss - prev[1])
+                prev[2] = 0
+        for name in [n for n in host.ewma if n not in totals]:
+            prev = host.ewma[name]
+            prev[2] += 1
+            if prev[2] >= _MAX_MISSES:
+                del host.ewma[name]
+            else:
+                prev[0] -= a * prev[0]
+                prev[1] -= a * prev[1]
+
+        for metric, col in (('cpu', 0), ('rss', 1)):
+            best = heapq.nlargest(self.k, host.ewma.items(), key=lambda kv: kv[1][col])
+            host.top[(metric, True)] = sorted((-v[col], hostname, name, None) for name, v in best)
+
+    def _evict_stale(self):
+        cutoff = timezone.now() - self.stale
+        while self._hosts:
+            hostname, host = next(iter(self._hosts.items()))
+            if host.created_at >= cutoff:
+                break
+            del self._hosts[hostname]
+
+    def _catch_up(self):
+        """Apply the newest snapshot per host committed by other workers."""
+        since = self._high_water or timezone.now() - self.stale
+        recent = (Snapshot.objects.filter(created_at__gt=since - self.sync_lag)
+                  .order_by('-created_at').values_list('id', 'hostname', 'created_at'))
+        newest = {}
+        for snap_id, hostname, created_at in recent:
+            newest.setdefault(hostname, (snap_id, created_at))
+        for hostname, (snap_id, created_at) in newest.items():
+            host = self._hosts.get(hostname)
+            if host is not None and created_at <= host.created_at:
+                continue
+            procs = Snapshot.process_values(snap_id, 'pid', 'name', 'cpu_percent', 'mem_rss')
+            with self._lock:
+                self._apply(hostname, created_at, procs)
+
+    # ---------------- Queries ----------------
+    def top(self, metric, limit=10, hostname=None, smoothed=False):
+        if metric not in METRICS:
+            raise ValueError(f"metric must be one of {', '.join(METRICS)}")
+        limit = max(0, min(limit, self.k))
+        key = (metric, smoothed)
+        self._ensure_started()
+        with self._lock:
+            self._evict_stale()
+            if hostname:
+                host = self._hosts.get(hostname)
+                items = host.top.get(key, [])[:limit] if host else []
+            else:
+                lists = [host.top[key] for host in self._hosts.values() if host.top.get(key)]
+                if len(lists) > limit:
+                    # Only hosts whose best entry ranks in the top ``limit``
+                    # can contribute to the result.
+                    lists = heapq.nsmallest(limit, lists, key=itemgetter(0))
+                items = list(islice(heapq.merge(*lists), limit))
+        return [self._row(item, smoothed) for item in items]
+
+    @staticmethod
+    def _row(item, smoothed):
+        value, hostname, name, pid = item
+        row = {'hostname': hostname, 'name': name, 'value': -value}
+        if not smoothed:
+            row['pid'] = pid
+        return row
+
+    # ---------------- Background sync ----------------
+    def _ensure_started(self):
+        # Started lazily so that each forked worker gets its own thread.
+        pid = os.getpid()
+        if self._owner == pid:
+            return
+        with self._lock:
+            if self._owner == pid:
+                return
+            if self._owner is not None:
+                # Forked from a process that already had an index: the parent's
+                # lock and thread did not survive, so start over.
+                self._lock = threading.RLock()
+                self._hosts = OrderedDict()
+                self._high_water = None
+            self._owner = pid
+            threading.Thread(target=self._sync_loop, name='top-consumers-sync', daemon=True).start()
+
+    def _sync_loop(self):
+        try:
+            self.rebuild()
+        except Exception:
+            logger.exception("top consumers: initial load failed")
+        while True:
+            time.sleep(self.sync_every)
+            try:
+                self._catch_up()
+                with self._lock:
+                    self._evict_stale()
+            except Exception:
+                logger.exception("top consumers: sync failed")
+                connection.close()  # reconnect on the next round
+
+    def rebuild(self):
+        """Load the last ``warmup`` snapshots of every host that is not stale.
+
+        Runs in the sync thread and only holds the lock while applying, so
+        ingest and queries keep going; a host that ingest already moved past a
+        loaded snapshot simply skips it.
+        """
+        recent = Snapshot.objects.filter(created_at__gte=timezone.now() - self.stale)
+        hosts = recent.order_by().values_list('hostname', flat=True).distinct()
+        for hostname in list(hosts):
+            snaps = list(recent.filter(hostname=hostname)
+                         .order_by('-created_at')
+                         .values_list('id', 'created_at')[:self.warmup])
+            for snap_id, created_at in reversed(snaps):
+                procs = Snapshot.process_values(snap_id, 'pid', 'name', 'cpu_percent', 'mem_rss')
+                with self._lock:
+                    self._apply(hostname, created_at, procs)
+
+    def reset(self):
+        with self._lock:
+            self._high_water = None
+            self._hosts = OrderedDict()
+
+
+index = TopConsumerIndex()
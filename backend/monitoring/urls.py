@@ -5,7 +5,12 @@ urlpatterns = [
     path('process-snapshots/', views.ingest_snapshot, name='ingest'),  # POST
     path('process-snapshots/latest', views.latest_snapshot, name='latest'),  # GET
     path('process-snapshots/list', views.list_snapshots, name='list'),  # GET
+    path('process-snapshots/diff', views.diff_snapshots, name='diff'),  # GET
     path('process-snapshots/<uuid:pk>', views.get_snapshot, name='detail'),  # GET
     path('process-snapshots/latest-page', views.latest_snapshot_page, name='latest-page'),
+    path('process-events/', views.ingest_events, name='ingest-events'),  # POST
+    path('process-events', views.list_events, name='events'),  # GET
+    path('process-names/search', views.search_process_names, name='process-name-search'),  # GET
+    path('top-consumers', views.top_consumers, name='top-consumers'),  # GET
 
 ]
@@ -1,11 +1,22 @@
+import uuid
+from datetime import timedelta
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.response import Response
 from rest_framework import status
+from django.conf import settings
 from django.db import transaction
-from .models import Snapshot, Process
-from .serializers import SnapshotInSerializer, SnapshotOutSerializer
+from .models import Snapshot, Process, ProcessColumns, ProcessEvent
+from . import columnar
+from .serializers import (
+    SnapshotInSerializer, SnapshotOutSerializer,
+    ProcessEventBatchInSerializer, ProcessEventOutSerializer,
+)
 from .auth import APIKeyAuthentication
+from .topk import index as top_index
+from .diff import snapshot_diff, limited
+from . import search
 from django.shortcuts import render
 
 API_KEY = "dev-api-key-please-change"  # must match agent.ini
@@ -24,17 +35,32 @@ def ingest_snapshot(request):
         created_at=data.get('created_at') or timezone.now(),
     )
 
-    procs = [Process(
-        snapshot=snapshot,
-        pid=p['pid'],
-        ppid=p['ppid'],
-        name=p['name'][:255],
-        cpu_percent=p.get('cpu_percent'),
-        mem_rss=p.get('mem_rss'),
-        mem_percent=p.get('mem_percent'),
+    rows = [(
+        p['pid'],
+        p['ppid'],
+        p['name'][:255],
+        p.get('cpu_percent'),
+        p.get('mem_rss'),
+        p.get('mem_percent'),
     ) for p in data['processes']]
 
-    Process.objects.bulk_create(procs, batch_size=1000)
+    if getattr(settings, 'SNAPSHOT_STORAGE', 'rows') == 'columnar':
+        ProcessColumns.objects.create(snapshot=snapshot, count=len(rows), data=columnar.encode(rows))
+    else:
+        Process.objects.bulk_create([Process(
+            snapshot=snapshot,
+            pid=pid,
+            ppid=ppid,
+            name=name,
+            cpu_percent=cpu,
+            mem_rss=rss,
+            mem_percent=memp,
+        ) for pid, ppid, name, cpu, rss, memp in rows], batch_size=1000)
+    search.record_names(snapshot.hostname, snapshot.created_at, (row[2] for row in rows))
+    transaction.on_commit(lambda: top_index.update(
+        snapshot.hostname, snapshot.created_at,
+        [(pid, name, cpu, rss) for pid, ppid, name, cpu, rss, memp in rows],
+    ), robust=True)  # the snapshot is committed; never turn an index error into a 500
     return Response({'snapshot_id': str(snapshot.id)}, status=status.HTTP_201_CREATED)
 
 @api_view(['GET'])
@@ -43,7 +69,7 @@ def latest_snapshot(request):
     qs = Snapshot.objects.all()
     if hostname:
         qs = qs.filter(hostname=hostname)
-    snap = qs.order_by('-created_at').prefetch_related('processes').first()
+    snap = qs.order_by('-created_at').select_related('columns').prefetch_related('processes').first()
     if not snap:
         return Response({'detail': 'No data'}, status=404)
     return Response(SnapshotOutSerializer(snap).data)
@@ -55,25 +81,122 @@ def list_snapshots(request):
     qs = Snapshot.objects.all()
     if hostname:
         qs = qs.filter(hostname=hostname)
-    snaps = list(qs.order_by('-created_at')[:limit])
+    snaps = list(qs.order_by('-created_at').select_related('columns').defer('columns__data')[:limit])
     data = [{
         'id': str(s.id),
         'hostname': s.hostname,
         'created_at': s.created_at,
-        'count': s.processes.count(),
+        'count': s.process_count,
     } for s in snaps]
     return Response(data)
 
 @api_view(['GET'])
 def get_snapshot(request, pk):
     try:
-        snap = Snapshot.objects.prefetch_related('processes').get(pk=pk)
+        snap = Snapshot.objects.select_related('columns').prefetch_related('processes').get(pk=pk)
     except Snapshot.DoesNotExist:
         return Response({'detail': 'Not found'}, status=404)
     return Response(SnapshotOutSerializer(snap).data)
 
 
+@api_view(['GET'])
+def top_consumers(request):
+    metric = request.query_params.get('metric', 'cpu')
+    hostname = request.query_params.get('hostname')
+    limit = int(request.query_params.get('limit', '10'))
+    smoothed = request.query_params.get('smoothed', '').lower() in ('1', 'true', 'yes')
+    try:
+        rows = top_index.top(metric, limit=limit, hostname=hostname, smoothed=smoothed)
+    except ValueError as e:
+        return Response({'detail': str(e)}, status=400)
+    return Response(rows)
+
+def _parse_ts(value):
+    """Aware datetime from an ISO string, or None if it isn't a valid timestamp."""
+    try:
+        dt = parse_datetime(value)
+    except ValueError:  # well-formed but impossible, e.g. 2026-02-30
+        return None
+    if dt is not None and timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    return dt
+
+@api_view(['GET'])
+def diff_snapshots(request):
+    params = request.query_params
+    limit = int(params.get('limit', '20'))
+    if params.get('old') and params.get('new'):
+        try:
+            old_id, new_id = uuid.UUID(params['old']), uuid.UUID(params['new'])
+        except ValueError:
+            return Response({'detail': 'old and new must be snapshot ids'}, status=400)
+    elif params.get('hostname') and params.get('old_at') and params.get('new_at'):
+        old_at, new_at = _parse_ts(params['old_at']), _parse_ts(params['new_at'])
+        if not old_at or not new_at:
+            return Response({'detail': 'old_at and new_at must be ISO timestamps'}, status=400)
+        qs = Snapshot.objects.filter(hostname=params['hostname']).order_by('-created_at')
+        old_id = qs.filter(created_at__lte=old_at).values_list('id', flat=True).first()
+        new_id = qs.filter(created_at__lte=new_at).values_list('id', flat=True).first()
+        if not old_id or not new_id:
+            return Response({'detail': 'Not found'}, status=404)
+    else:
+        return Response({'detail': 'Pass old and new, or hostname, old_at and new_at'}, status=400)
+    try:
+        diff = snapshot_diff(old_id, new_id)
+    except Snapshot.DoesNotExist:
+        return Response({'detail': 'Not found'}, status=404)
+    return Response(limited(diff, limit))
+
+@api_view(['GET'])
+def search_process_names(request):
+    q = request.query_params.get('q', '')
+    if not q.strip():
+        return Response({'detail': 'q is required'}, status=400)
+    limit = max(0, min(int(request.query_params.get('limit', '50')), 500))
+    offset = max(0, int(request.query_params.get('offset', '0')))
+    qs = search.search(q, hostname=request.query_params.get('hostname'))
+    rows = qs.order_by('-last_seen', 'hostname', 'name').values(
+        'hostname', 'name', 'first_seen', 'last_seen', 'snapshot_count')[offset:offset + limit]
+    return Response({'count': qs.count(), 'offset': offset, 'limit': limit, 'results': list(rows)})
+
+@api_view(['POST'])
+@authentication_classes([APIKeyAuthentication])
+@permission_classes([])
+@transaction.atomic
+def ingest_events(request):
+    serializer = ProcessEventBatchInSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    data = serializer.validated_data
+    kinds = {'start': ProcessEvent.START, 'exit': ProcessEvent.EXIT}
+    ProcessEvent.objects.bulk_create([ProcessEvent(
+        hostname=data['hostname'],
+        kind=kinds[e['type']],
+        pid=e['pid'],
+        ppid=e.get('ppid'),
+        name=e.get('name', '')[:255],
+        ts=e['ts'],
+        lifetime=e.get('lifetime'),
+    ) for e in data['events']], batch_size=1000)
+    return Response({'count': len(data['events'])}, status=status.HTTP_201_CREATED)
+
+@api_view(['GET'])
+def list_events(request):
+    params = request.query_params
+    until = _parse_ts(params['until']) if params.get('until') else timezone.now()
+    since = _parse_ts(params['since']) if params.get('since') else until and until - timedelta(minutes=15)
+    if not since or not until:
+        return Response({'detail': 'since and until must be ISO timestamps'}, status=400)
+    limit = max(0, min(int(params.get('limit', '1000')), 10000))
+    qs = ProcessEvent.objects.filter(ts__gte=since, ts__lt=until)
+    if params.get('hostname'):
+        qs = qs.filter(hostname=params['hostname'])
+    if params.get('type') in ('start', 'exit'):
+        qs = qs.filter(kind=ProcessEvent.START if params['type'] == 'start' else ProcessEvent.EXIT)
+    if params.get('name'):
+        qs = qs.filter(name=params['name'])
+    events = qs.order_by('ts')[:limit]
+    return Response(ProcessEventOutSerializer(events, many=True).data)
 
 def latest_snapshot_page(request):
-    snapshot = Snapshot.objects.order_by('-created_at').prefetch_related('processes').first()
+    snapshot = Snapshot.objects.order_by('-created_at').select_related('columns').prefetch_related('processes').first()
     return render(request, 'latest_snapshot.html', {'snapshot': snapshot})
\ No newline at end of file